@@ -11,6 +11,7 @@ import numpy as np
 from pandas_schema import Column, Schema
 from pandas_schema.validation import CustomElementValidation
 import matplotlib.pyplot as plt
+from writer import write_csv
 
 
 ### Create data frame from 'fossil-fuel-co2-emissions-by-nation_csv' data
@@ -49,9 +50,9 @@ errors_index_rows = [e.row for e in errors]
 data_cleaned = data.drop(index=errors_index_rows)[:20]
 
 
-## Export validated data and errors to csv file
-pd.DataFrame({'Errors':errors}).to_csv('errors.csv')
-data_cleaned.to_csv('cleaned_data.csv')
+## Export validated data and errors to csv file in background
+write_csv(pd.DataFrame({'Errors':errors}), 'errors.csv')
+write_csv(data_cleaned, 'cleaned_data.csv')
 
 ### Defining list of indexes in dataframe
 keys = data_cleaned.index.values
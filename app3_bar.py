@@ -12,6 +12,8 @@ import numpy as np
 from pandas_schema import Column, Schema
 from pandas_schema.validation import CustomElementValidation
 import matplotlib.pyplot as plt
+from writer import write_csv
+from guardrails import preflight
 
 
 ### Create data frame from 'fossil-fuel-co2-emissions-by-nation_csv' data
@@ -53,9 +55,9 @@ errors_index_rows = [e.row for e in errors]
 data_cleaned = data.drop(index=errors_index_rows)
 
 
-## Export validated data and errors to csv file
-pd.DataFrame({'Errors':errors}).to_csv('errors.csv')
-data_cleaned.to_csv('cleaned_data.csv')
+## Export validated data and errors to csv file in background
+write_csv(pd.DataFrame({'Errors':errors}), 'errors.csv')
+write_csv(data_cleaned, 'cleaned_data.csv')
 
 
 ### Isolating separate DF and sort them
@@ -93,7 +95,9 @@ for r in range(nrow):
         value = np.array2string(data_list[count].columns.values, formatter={'int':lambda x: chr(x).encode()}, separator='').strip("['']")
         ### Set title for subplot
         a.set_title(f'Total carbon emission by country by {value}')
-        a.set_xticklabels(data_list[count][value])
         a.invert_yaxis()
         count+=1
+
+### Check ticks and artists of the figure before drawing
+preflight(fig, 'app3_bar')
 plt.show()
@@ -11,12 +11,15 @@ import numpy as np
 from pandas_schema import Column, Schema
 from pandas_schema.validation import CustomElementValidation
 import matplotlib.pyplot as plt
+from writer import write_csv
+from reconcile import apply_overrides
+from guardrails import set_ticks, preflight
 
 ### Create two data frames from fossil-fuel-co2-emissions-by-nation_csv and population_csv files
 data1 = pd.read_csv('fossil-fuel-co2-emissions-by-nation_csv.csv')
 data2 = pd.read_csv('population_csv.csv')
-### Create new column and apply capitalization to prepare for merging
-data2['Country'] = data2['Country Name'].str.upper()
+### Create new column, map World Bank names onto emissions names (e.g. 'United States') and apply capitalization to prepare for merging
+data2['Country'] = apply_overrides(data2['Country Name'], data1['Country'], 'population').str.upper()
 ### Merge both data frames on matching values in columns Country and Year
 data = data1.merge(data2, how='inner', on=['Country', 'Year'])
 ### Isolate 4 columns and sort it from maximum value of Total
@@ -53,9 +56,9 @@ errors_index_rows = [e.row for e in errors]
 data_cleaned = data.drop(index=errors_index_rows)
 
 
-## Export validated data and errors to csv file
-pd.DataFrame({'Errors':errors}).to_csv('errors.csv')
-data_cleaned.to_csv('cleaned_data.csv')
+## Export validated data and errors to csv file in background
+write_csv(pd.DataFrame({'Errors':errors}), 'errors.csv')
+write_csv(data_cleaned, 'cleaned_data.csv')
 
 ### Create groups for each country
 data = data_cleaned.groupby(['Country'])
@@ -79,7 +82,7 @@ ax1=ax[0,0].scatter(poland['Year'], poland['Value'], c=poland['Total'], vmin=pol
 ax1_y = np.arange(poland['Value'].min(), poland['Value'].max(), step=1000000)
 ax[0,0].set_title('Carbon emmision by population over the years in Poland')
 ax[0,0].set_ylabel('Population in 10 millions')
-ax[0,0].set_yticks(ax1_y)
+set_ticks(ax[0,0], ax1_y, chart='app4_scatter')
 fig.colorbar(ax1, ax=ax[0,0], label='Carbon Emission')
 ### Second subplot
 
@@ -87,7 +90,7 @@ ax2 = ax[0,1].scatter(india['Year'], india['Value'], c=india['Total'], cmap='Gre
 ax2_y = np.arange(india['Value'].min(), india['Value'].max(), step=1000000)
 ax[0,1].set_title('Carbon emmision by population over the years in India')
 ax[0,1].set_ylabel('Population in 10 millions')
-ax[0,1].set_yticks(ax2_y)
+set_ticks(ax[0,1], ax2_y, chart='app4_scatter')
 ax[0,1].set_yscale('log')
 fig.colorbar(ax2, ax=ax[0,1], label='Carbon Emission')
 
@@ -96,7 +99,7 @@ ax3 = ax[1,0].scatter(swe['Year'], swe['Value'], c=swe['Total'], cmap='Greens',
 ax3_y = np.arange(swe['Value'].min(), swe['Value'].max(), step=1000000)
 ax[1,0].set_title('Carbon emmision by population over the years in Sweden')
 ax[1,0].set_ylabel('Population in 10 millions')
-ax[1,0].set_yticks(ax3_y)
+set_ticks(ax[1,0], ax3_y, chart='app4_scatter')
 fig.colorbar(ax3, ax=ax[1,0], label='Carbon Emission')
 ### Fourth subplot
 
@@ -104,7 +107,7 @@ ax4 = ax[1,1].scatter(jap['Year'], jap['Value'], c=jap['Total'], cmap='Greens',v
 ax4_y = np.arange(jap['Value'].min(), jap['Value'].max(), step=1000000)
 ax[1,1].set_title('Carbon emmision by population over the years in Japan')
 ax[1,1].set_ylabel('Population in 10 millions')
-ax[1,1].set_yticks(ax4_y)
+set_ticks(ax[1,1], ax4_y, chart='app4_scatter')
 ax[1,1].set_yscale('log')
 fig.colorbar(ax4, ax=ax[1,1], label='Carbon Emission')
 
@@ -113,7 +116,7 @@ ax5 = ax[2,0].scatter(ger['Year'], ger['Value'], c=ger['Total'], cmap='Greens',v
 ax5_y = np.arange(ger['Value'].min(), ger['Value'].max(), step=1000000)
 ax[2,0].set_title('Carbon emmision by population over the years in Germany')
 ax[2,0].set_ylabel('Population in 10 millions')
-ax[2,0].set_yticks(ax5_y)
+set_ticks(ax[2,0], ax5_y, chart='app4_scatter')
 fig.colorbar(ax5, ax=ax[2,0], label='Carbon Emission')
 
 ### Sixth subplot
@@ -121,7 +124,9 @@ ax6 = ax[2,1].scatter(bel['Year'], bel['Value'], c=bel['Total'], cmap='Greens',v
 ax6_y = np.arange(bel['Value'].min(), bel['Value'].max(), step=1000000)
 ax[2,1].set_title('Carbon emmision by population over the years in Belgium')
 ax[2,1].set_ylabel('Population in 10 millions')
-ax[2,1].set_yticks(ax6_y)
+set_ticks(ax[2,1], ax6_y, chart='app4_scatter')
 fig.colorbar(ax6, ax=ax[2,1], label='Carbon Emission')
 
+### Check ticks and artists of the figure before drawing
+preflight(fig, 'app4_scatter')
 plt.show()
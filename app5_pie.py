@@ -11,6 +11,7 @@ import numpy as np
 from pandas_schema import Column, Schema
 from pandas_schema.validation import CustomElementValidation
 import matplotlib.pyplot as plt
+from writer import write_csv
 
 ### Create data frame from 'fossil-fuel-co2-emissions-by-nation_csv' data
 ### Isolate two columns ('Country' and 'Total') and group data by Country
@@ -42,9 +43,9 @@ errors_index_rows = [e.row for e in errors]
 data_cleaned = data_1.drop(index=errors_index_rows).sort_values('Total', ascending=False)
 
 
-## Export validated data and errors to csv file
-pd.DataFrame({'Errors':errors}).to_csv('errors.csv')
-data_cleaned.to_csv('cleaned_data.csv')
+## Export validated data and errors to csv file in background
+write_csv(pd.DataFrame({'Errors':errors}), 'errors.csv')
+write_csv(data_cleaned, 'cleaned_data.csv')
 
 ### Find numbers 80/20 ratio of records
 total = data_cleaned.shape[0]
@@ -11,6 +11,7 @@ import numpy as np
 from pandas_schema import Column, Schema
 from pandas_schema.validation import CustomElementValidation, DateFormatValidation
 import matplotlib.pyplot as plt
+from forecast import fit_trends, plot_trend
 
 ### Create data frame from 'fossil-fuel-co2-emissions-by-nation_csv' data and 'natural_gas_price_monthly_csv.csv'
 data1 = pd.read_csv('fossil-fuel-co2-emissions-by-nation_csv.csv', parse_dates=['Year'])
@@ -73,6 +74,9 @@ data_2 = data2_cleaned.groupby('Year').mean()
 ### Create new dataframe by merging validated dataframes
 data = data1_cleaned.merge(data_2, how='inner', on=['Year'])
 
+### Linear trend of Gas Fuel emissions since 1997 (first year of gas prices) projected 10 years ahead
+trend = fit_trends(data1_cleaned.assign(Year=data1_cleaned['Year'].astype(int)), ('Gas Fuel',), 'linear', start=1997, horizon=10)
+
 ### Groupby column Country 
 data = data.groupby('Country')
 
@@ -96,6 +100,7 @@ plt.style.use('fivethirtyeight')
 ax1 = ax[0,0]
 ax1.bar(poland['Year'], poland['Gas Fuel'], color='g', alpha=0.5)
 ax1.set_ylabel('Gas Fuel emissions', color='g')
+plot_trend(ax1, *trend.get('POLAND', 'Gas Fuel'), color='g', x=lambda years: [str(y) for y in years])
 ax2 = ax1.twinx() 
 ax2.plot(poland['Year'], poland['Price'])
 ax2.set_ylabel('Gas Price', color='b')
@@ -107,6 +112,7 @@ ax1.set_title('Carbon emmision by Gas Fuel vs Gas Price in Poland')
 ax1 = ax[0,1]
 ax1.bar(india['Year'], india['Gas Fuel'], color='g', alpha=0.5)
 ax1.set_ylabel('Gas Fuel emissions', color='g')
+plot_trend(ax1, *trend.get('INDIA', 'Gas Fuel'), color='g', x=lambda years: [str(y) for y in years])
 ax2 = ax1.twinx() 
 ax2.plot(india['Year'], india['Price'])
 ax2.set_ylabel('Gas Price', color='b')
@@ -116,6 +122,7 @@ ax1.set_title('Carbon emmision by Gas Fuel vs Gas Price in India')
 ax1 = ax[1,0]
 ax1.bar(swe['Year'], swe['Gas Fuel'], color='g', alpha=0.5)
 ax1.set_ylabel('Gas Fuel emissions', color='g')
+plot_trend(ax1, *trend.get('SWEDEN', 'Gas Fuel'), color='g', x=lambda years: [str(y) for y in years])
 ax2 = ax1.twinx() 
 ax2.plot(swe['Year'], swe['Price'])
 ax2.set_ylabel('Gas Price', color='b')
@@ -125,6 +132,7 @@ ax1.set_title('Carbon emmision by Gas Fuel vs Gas Price in Sweden')
 ax1 = ax[1,1]
 ax1.bar(jap['Year'], jap['Gas Fuel'], color='g', alpha=0.5)
 ax1.set_ylabel('Gas Fuel emissions', color='g')
+plot_trend(ax1, *trend.get('JAPAN', 'Gas Fuel'), color='g', x=lambda years: [str(y) for y in years])
 ax2 = ax1.twinx() 
 ax2.plot(jap['Year'], jap['Price'])
 ax2.set_ylabel('Gas Price', color='b')
@@ -134,6 +142,7 @@ ax1.set_title('Carbon emmision by Gas Fuel vs Gas Price in Japan')
 ax1 = ax[2,0]
 ax1.bar(ger['Year'], ger['Gas Fuel'], color='g', alpha=0.5)
 ax1.set_ylabel('Gas Fuel emissions', color='g')
+plot_trend(ax1, *trend.get('GERMANY', 'Gas Fuel'), color='g', x=lambda years: [str(y) for y in years])
 ax2 = ax1.twinx() 
 ax2.plot(ger['Year'], ger['Price'])
 ax2.set_ylabel('Gas Price', color='b')
@@ -143,6 +152,7 @@ ax1.set_title('Carbon emmision by Gas Fuel vs Gas Price in Germany')
 ax1 = ax[2,1]
 ax1.bar(bel['Year'], bel['Gas Fuel'], color='g', alpha=0.5)
 ax1.set_ylabel('Gas Fuel emissions', color='g')
+plot_trend(ax1, *trend.get('BELGIUM', 'Gas Fuel'), color='g', x=lambda years: [str(y) for y in years])
 ax2 = ax1.twinx() 
 ax2.plot(bel['Year'], bel['Price'])
 ax2.set_ylabel('Gas Price', color='b')
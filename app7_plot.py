@@ -11,7 +11,9 @@ import numpy as np
 from pandas_schema import Column, Schema
 from pandas_schema.validation import CustomElementValidation, DateFormatValidation
 import matplotlib.pyplot as plt
+from writer import write_csv
 import pycountry
+from reconcile import apply_overrides
 
 ### Create data frames from 'fossil-fuel-co2-emissions-by-nation_csv' and 'pharmaceutical-drug-spending.csv'
 data1 = pd.read_csv('fossil-fuel-co2-emissions-by-nation_csv.csv')
@@ -22,6 +24,8 @@ data2 = data2[['LOCATION','TIME','TOTAL_SPEND']]
 
 ### Create new column with full name of location based on alpha-3 code
 data2['Country'] = data2['LOCATION'].apply(lambda x: pycountry.countries.get(alpha_3=x).name)
+### Map pycountry names onto emissions names (e.g. 'United States')
+data2['Country'] = apply_overrides(data2['Country'], (), 'drug_spending')
 ###Convert Country column into capitilized
 data1['Country'] = data1['Country'].str.capitalize()
 data2['Country'] = data2['Country'].str.capitalize()
@@ -74,11 +78,11 @@ errors_index_rows2 = [e.row for e in errors2]
 data1_cleaned = data1.drop(index=errors_index_rows1)
 data2_cleaned = data2.drop(index=errors_index_rows2)
 
-## Export validated data and errors to csv file
-pd.DataFrame({'Errors':errors1}).to_csv('errors1.csv')
-data1_cleaned.to_csv('cleaned_data1.csv')
-pd.DataFrame({'Errors':errors2}).to_csv('errors2.csv')
-data2_cleaned.to_csv('cleaned_data2.csv')
+## Export validated data and errors to csv file in background
+write_csv(pd.DataFrame({'Errors':errors1}), 'errors1.csv')
+write_csv(data1_cleaned, 'cleaned_data1.csv')
+write_csv(pd.DataFrame({'Errors':errors2}), 'errors2.csv')
+write_csv(data2_cleaned, 'cleaned_data2.csv')
 
 ### Merge dataframes into one on Year/TIME and Country and drop LOCATION and TIME columns
 data = data1_cleaned.merge(data2_cleaned, how='inner' ,left_on=['Year', 'Country'], right_on=['TIME', 'Country']).drop(['LOCATION','TIME'], axis=1)
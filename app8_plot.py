@@ -11,6 +11,8 @@ import numpy as np
 from pandas_schema import Column, Schema
 from pandas_schema.validation import CustomElementValidation, DateFormatValidation
 import matplotlib.pyplot as plt
+from writer import write_csv
+from forecast import fit_trends, plot_trend
 
 ### Create data frames from 'fossil-fuel-co2-emissions-by-nation_csv' and 'pharmaceutical-drug-spending.csv'
 data1 = pd.read_csv('fossil-fuel-co2-emissions-by-nation_csv.csv')
@@ -56,11 +58,14 @@ errors_index_rows2 = [e.row for e in errors2]
 data1_cleaned = data1.drop(index=errors_index_rows1)
 data2_cleaned = data2.drop(index=errors_index_rows2)
 
-## Export validated data and errors to csv file
-pd.DataFrame({'Errors':errors1}).to_csv('errors1.csv')
-pd.DataFrame({'Errors':errors2}).to_csv('errors2.csv')
-data1_cleaned.to_csv('cleaned_data1.csv')
-data2_cleaned.to_csv('cleaned_data2.csv')
+## Export validated data and errors to csv file in background
+write_csv(pd.DataFrame({'Errors':errors1}), 'errors1.csv')
+write_csv(pd.DataFrame({'Errors':errors2}), 'errors2.csv')
+write_csv(data1_cleaned, 'cleaned_data1.csv')
+write_csv(data2_cleaned, 'cleaned_data2.csv')
+
+### Linear trend of Total emissions since 1970 projected 10 years ahead
+trend = fit_trends(data1_cleaned, ('Total',), 'linear', start=1970, horizon=10)
 
 ### Group data1 by country
 data_1 = data1_cleaned.groupby('Country')
@@ -96,6 +101,7 @@ plt.style.use('fivethirtyeight')
 ax1 = ax[0,0]
 ax1.bar(usa['Year'], usa['Total'], color='g', alpha=0.5)
 ax1.set_ylabel('Carbon emissions', color='g')
+plot_trend(ax1, *trend.get('UNITED STATES OF AMERICA'), color='g')
 ax2 = ax1.twinx() 
 ax2.plot(usa['Year'], usa['TOTAL_SPEND'])
 ax2.set_ylabel('Total Drugs Expense (mln)', color='b')
@@ -105,6 +111,7 @@ ax1.set_title('Carbon emmision against drugs spend in USA')
 ax1 = ax[0,1]
 ax1.bar(bel['Year'], bel['Total'], color='g', alpha=0.5)
 ax1.set_ylabel('Carbon emissions', color='g')
+plot_trend(ax1, *trend.get('BELGIUM'), color='g')
 ax2 = ax1.twinx() 
 ax2.plot(bel['Year'], bel['TOTAL_SPEND'])
 ax2.set_ylabel('Total Drugs Expense (mln)', color='b')
@@ -114,6 +121,7 @@ ax1.set_title('Carbon emmision against drugs spend in Belgium')
 ax1 = ax[1,0]
 ax1.bar(pol['Year'], pol['Total'], color='g', alpha=0.5)
 ax1.set_ylabel('Carbon emissions', color='g')
+plot_trend(ax1, *trend.get('POLAND'), color='g')
 ax2 = ax1.twinx() 
 ax2.plot(pol['Year'], pol['TOTAL_SPEND'])
 ax2.set_ylabel('Total Drugs Expense (mln)', color='b')
@@ -123,6 +131,7 @@ ax1.set_title('Carbon emmision against drugs spend in Poland')
 ax1 = ax[1,1]
 ax1.bar(aus['Year'], aus['Total'], color='g', alpha=0.5)
 ax1.set_ylabel('Carbon emissions', color='g')
+plot_trend(ax1, *trend.get('AUSTRALIA'), color='g')
 ax2 = ax1.twinx() 
 ax2.plot(aus['Year'], aus['TOTAL_SPEND'])
 ax2.set_ylabel('Total Drugs Expense (mln)', color='b')
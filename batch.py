@@ -0,0 +1,428 @@
+"""
+##############################################################################
+#######                 PROJECT NAME : CO2 EMISSIONS                   #######
+##############################################################################
+                                Synopsis:
+Script which regenerates charts of all app scripts as image files in one run.
+Each chart declares its load, validate, transform and render steps as nodes of pipeline.Pipeline,
+so shared steps (loading and validating the emissions data, grouping by Country) are computed once.
+"""
+
+### Import necessary libraries
+import os
+import argparse
+import weakref
+import functools
+import threading
+import contextlib
+import numpy as np
+import pycountry
+import matplotlib
+from matplotlib import style
+from multiprocessing import Pool
+from matplotlib.figure import Figure
+from pipeline import Pipeline
+from forecast import fit_trends, plot_trend
+from rebuild import Slice, rebuild
+import shared
+from reconcile import OVERRIDES_CSV, apply_overrides
+from guardrails import set_ticks, preflight
+from hierarchy import GROUPS_CSV, CODES_CSV, build_hierarchy
+from writer import get_writer, flush
+from stages import (EMISSIONS_CSV, POPULATION_CSV, GAS_PRICE_CSV, DRUG_SPENDING_CSV, SOURCES,
+                    load_csv, group_sum, validate, drop_errors, top, merge_population)
+
+### Directory for generated image files
+OUTPUT_DIR = 'charts'
+
+### Countries plotted by app4_scatter.py and app6_plot.py
+COUNTRIES = (('POLAND', 'Poland'), ('INDIA', 'India'), ('SWEDEN', 'Sweden'),
+             ('JAPAN', 'Japan'), ('GERMANY', 'Germany'), ('BELGIUM', 'Belgium'))
+### Countries plotted by app8_plot.py with their alpha-3 codes
+DRUG_COUNTRIES = (('UNITED STATES OF AMERICA', 'USA', 'USA'), ('BELGIUM', 'BEL', 'Belgium'),
+                  ('POLAND', 'POL', 'Poland'), ('AUSTRALIA', 'AUS', 'Australia'))
+### Years plotted by app7_plot.py
+DRUG_YEARS = (1980, 1985, 1990, 1995)
+### First years of trends overlaid on app6_plot.py (gas prices start in 1997) and app8_plot.py charts
+GAS_TREND_START = 1997
+DRUG_TREND_START = 1970
+### Number of projected years
+TREND_HORIZON = 10
+
+
+### Transform steps used by single charts
+
+### Gas Fuel emissions with Year as string, as in app6_plot.py
+def gas_fuel_by_year(emissions):
+    data = emissions[['Year', 'Gas Fuel', 'Country']].copy()
+    data['Year'] = data['Year'].astype(str)
+    return data
+
+### Year back from string to integer, for fitting trends
+def to_int_year(data):
+    return data.assign(Year=data['Year'].astype(int))
+
+### Gas price with Year isolated from Month
+def price_by_year(prices):
+    return prices.assign(Year=prices['Month'].str[:4])[['Price', 'Year']]
+
+### Mean price for each year merged with gas emissions
+def merge_price(emissions, prices):
+    return emissions.merge(prices.groupby('Year').mean(), how='inner', on=['Year'])
+
+### Drug spending with full capitalized name of location based on alpha-3 code
+def drug_spend_with_country(spend):
+    data = spend[['LOCATION', 'TIME', 'TOTAL_SPEND']].copy()
+    data['Country'] = data['LOCATION'].apply(lambda x: pycountry.countries.get(alpha_3=x).name)
+    ### pycountry names are mapped onto emissions names with override table, e.g. 'United States'
+    data['Country'] = apply_overrides(data['Country'], (), 'drug_spending').str.capitalize()
+    return data
+
+### Emissions with capitalized Country column
+def capitalize_country(emissions):
+    return emissions[['Year', 'Country', 'Total']].assign(Country=emissions['Country'].str.capitalize())
+
+### Merge emissions with drug spending on Year/TIME and Country
+def merge_drug_spend(emissions, spend):
+    return emissions.merge(spend, how='inner', left_on=['Year', 'Country'], right_on=['TIME', 'Country']).drop(['LOCATION', 'TIME'], axis=1)
+
+
+### Render steps, each returns a figure
+
+### Styles are global matplotlib settings, so every render and every save runs alone, starting from default settings
+_style_lock = threading.Lock()
+### Settings each figure was rendered with, its image is saved with the same settings
+_figure_settings = weakref.WeakKeyDictionary()
+
+@contextlib.contextmanager
+def _settings(rc=None):
+    with _style_lock, matplotlib.rc_context():
+        matplotlib.rcdefaults()
+        if rc is not None:
+            matplotlib.rcParams.update(rc)
+        yield
+
+### Decorator of render steps, style set by the render (as in its script) is kept for saving the figure
+def styled(render):
+    @functools.wraps(render)
+    def wrapper(*args, **kwargs):
+        with _settings():
+            fig = render(*args, **kwargs)
+            ### Ticks are created lazily and take style settings when created, later ticks copy the first ones
+            for ax in fig.axes:
+                for axis in (ax.xaxis, ax.yaxis):
+                    axis.get_major_ticks()
+                    axis.get_minor_ticks()
+            _figure_settings[fig] = {key: value for key, value in matplotlib.rcParams.items() if key != 'backend'}
+            return fig
+    return wrapper
+
+### app1_pie.py
+@styled
+def render_top10_pie(data):
+    fig = Figure()
+    fig.subplots().pie(data['Total'], labels=data.index, radius=1, textprops={'fontsize': 10}, autopct='%1.1f%%')
+    return fig
+
+### app2_bar.py
+@styled
+def render_sources_bar(data):
+    style.use('fivethirtyeight')
+    fig = Figure(figsize=(30,10), tight_layout=True)
+    ax = fig.subplots()
+    data.plot(kind='bar', ax=ax)
+    ax.set_title('total carbon emission by country')
+    ax.set_yscale('log')
+    return fig
+
+### app2_bar2.py
+@styled
+def render_sources_barh(data):
+    fig = Figure(figsize=(35,15), constrained_layout=True)
+    axes = fig.subplots(len(data.index), sharex=True)
+    style.use('fivethirtyeight')
+    fig.suptitle('Total Carbon Emission by each country')
+    for ax, key in zip(axes, data.index.values):
+        data[data.index.values == key].plot(kind='barh', ax=ax, legend=False)
+    axes[-1].set_xlabel('Total Carbon Emission (million metric tons of C)')
+    axes[-1].set_xscale('log')
+    axes[-1].legend()
+    return fig
+
+### app3_bar.py
+@styled
+def render_top10_by_source(data):
+    fig = Figure(figsize=(35,15), constrained_layout=True)
+    axes = fig.subplots(3, 2)
+    for ax, column in zip(axes.flat, ('Total', *SOURCES)):
+        top(data, (column,), column, 10).plot(kind='barh', ax=ax)
+        ax.set_title(f'Total carbon emission by country by {column}')
+        ax.invert_yaxis()
+    return fig
+
+### app4_scatter.py, population of India and Japan on log scale
+@styled
+def render_population_scatter(data):
+    fig = Figure(figsize=(35,15), constrained_layout=True)
+    axes = fig.subplots(3, 2, sharex=True)
+    style.use('ggplot')
+    groups = data.groupby('Country')
+    for ax, (country, name) in zip(axes.flat, COUNTRIES):
+        group = groups.get_group(country)
+        points = ax.scatter(group['Year'], group['Value'], c=group['Total'], vmin=group['Total'].min(), vmax=group['Total'].max(),
+                            cmap='Greens', alpha=0.75, edgecolor='black', linewidth=1)
+        ax.set_title(f'Carbon emmision by population over the years in {name}')
+        ax.set_ylabel('Population in 10 millions')
+        set_ticks(ax, np.arange(group['Value'].min(), group['Value'].max(), step=1000000), chart='app4_scatter')
+        if country in ('INDIA', 'JAPAN'):
+            ax.set_yscale('log')
+        fig.colorbar(points, ax=ax, label='Carbon Emission')
+    return fig
+
+### app5_pie.py
+@styled
+def render_top20_percent_pie(data):
+    first_20 = int(data.shape[0] * 0.2)
+    top_sum = data[:first_20]['Total'].sum()
+    bot_sum = data[first_20:]['Total'].sum()
+    style.use('ggplot')
+    fig = Figure(figsize=(35,15))
+    ax = fig.subplots()
+    ax.pie([top_sum, bot_sum], labels=['Top 20','Rest of the world'], startangle=90, explode=[0.2,0], radius=1.1,
+           textprops={'fontsize': 10}, autopct='%1.1f%%', shadow=True)
+    ax.set_title('Comparison of 20% major contribiutors of CO2 emission \n vs rest of the world')
+    return fig
+
+### app6_plot.py
+@styled
+def render_gas_price(data, trend):
+    fig = Figure(figsize=(30,15), constrained_layout=True)
+    axes = fig.subplots(3, 2, sharex=True)
+    style.use('fivethirtyeight')
+    groups = data.groupby('Country')
+    for ax1, (country, name) in zip(axes.flat, COUNTRIES):
+        group = groups.get_group(country)
+        ax1.bar(group['Year'], group['Gas Fuel'], color='g', alpha=0.5)
+        ax1.set_ylabel('Gas Fuel emissions', color='g')
+        ### Years are strings on this chart
+        plot_trend(ax1, *trend.get(country, 'Gas Fuel'), color='g', x=lambda years: [str(y) for y in years])
+        ax2 = ax1.twinx()
+        ax2.plot(group['Year'], group['Price'])
+        ax2.set_ylabel('Gas Price', color='b')
+        ax1.set_title(f'Carbon emmision by Gas Fuel vs Gas Price in {name}')
+    return fig
+
+### app7_plot.py
+@styled
+def render_drug_spend_years(data):
+    fig = Figure(figsize=(30,15), constrained_layout=True)
+    axes = fig.subplots(2, 2, sharey=True)
+    style.use('fivethirtyeight')
+    groups = data.groupby('Year')
+    for ax1, year in zip(axes.flat, DRUG_YEARS):
+        group = groups.get_group(year).set_index('Country')[:10]
+        ax1.plot(group.index, group['Total'], color='g')
+        ax1.set_ylabel('Carbon emissions', color='g')
+        ax2 = ax1.twinx()
+        ax2.bar(group.index, group['TOTAL_SPEND'], alpha=0.5)
+        ax2.set_ylabel('Drug costs')
+        ax2.set_title(f'Total carbon emissions vs total cost of drugs in {year}')
+    return fig
+
+### app8_plot.py
+@styled
+def render_drug_spend_countries(emissions, spend, trend):
+    fig = Figure(figsize=(30,15), constrained_layout=True)
+    axes = fig.subplots(2, 2)
+    style.use('fivethirtyeight')
+    emissions = emissions.groupby('Country')
+    spend = spend.groupby('LOCATION')
+    for ax1, (country, location, name) in zip(axes.flat, DRUG_COUNTRIES):
+        group = emissions.get_group(country).merge(spend.get_group(location), how='inner', left_on='Year', right_on='TIME')
+        ax1.bar(group['Year'], group['Total'], color='g', alpha=0.5)
+        ax1.set_ylabel('Carbon emissions', color='g')
+        plot_trend(ax1, *trend.get(country), color='g')
+        ax2 = ax1.twinx()
+        ax2.plot(group['Year'], group['TOTAL_SPEND'])
+        ax2.set_ylabel('Total Drugs Expense (mln)', color='b')
+        ax1.set_title(f'Carbon emmision against drugs spend in {name}')
+    return fig
+
+
+### Slices of data read by each chart, used to re-render only charts whose data changed
+def chart_slices():
+    countries = [country for country, _ in COUNTRIES]
+    totals = [Slice(EMISSIONS_CSV, ('Country', 'Total'))]
+    sources = [Slice(EMISSIONS_CSV, ('Country', *SOURCES, 'Total'))]
+    ### Name matches of override table used by joins of a chart, rows of other datasets do not affect it
+    overrides = lambda dataset: Slice(OVERRIDES_CSV, ('Dataset', 'Name', 'Match'), (dataset,), country_column='Dataset')
+    return {
+        ### Charts aggregated over all countries and years
+        'app1_pie': totals,
+        'app2_bar': sources,
+        'app2_bar2': sources,
+        'app3_bar': sources,
+        'app5_pie': totals,
+        ### Charts with panels of selected countries or years
+        'app4_scatter': [Slice(EMISSIONS_CSV, ('Country', 'Year', 'Total'), countries),
+                         Slice(POPULATION_CSV, ('Country Name', 'Year', 'Value'), [name for _, name in COUNTRIES], country_column='Country Name'),
+                         overrides('population')],
+        'app6_plot': [Slice(EMISSIONS_CSV, ('Country', 'Year', 'Gas Fuel'), countries),
+                      Slice(GAS_PRICE_CSV, ('Month', 'Price'))],
+        'app7_plot': [Slice(EMISSIONS_CSV, ('Country', 'Year', 'Total'), years=DRUG_YEARS),
+                      Slice(DRUG_SPENDING_CSV, ('LOCATION', 'TIME', 'TOTAL_SPEND'), years=DRUG_YEARS, year_column='TIME'),
+                      overrides('drug_spending')],
+        'app8_plot': [Slice(EMISSIONS_CSV, ('Country', 'Year', 'Total'), [country for country, _, _ in DRUG_COUNTRIES]),
+                      Slice(DRUG_SPENDING_CSV, ('LOCATION', 'TIME', 'TOTAL_SPEND'), [code for _, code, _ in DRUG_COUNTRIES], country_column='LOCATION')],
+        'regions_plot': [Slice(EMISSIONS_CSV, ('Country', 'Year', *SOURCES, 'Total')),
+                         Slice(POPULATION_CSV, ('Country Name', 'Country Code', 'Year', 'Value')),
+                         overrides('population'),
+                         Slice(GROUPS_CSV, ('Country Code', 'Group Code', 'Level')),
+                         Slice(CODES_CSV, ('Country', 'Country Code'))],
+    }
+
+
+### Regional emissions and per capita emissions of income groups over the years
+### Emissions entities left out of all groups are listed on the chart
+@styled
+def render_regions(hierarchy):
+    fig = Figure(figsize=(30,15), constrained_layout=True)
+    ax1, ax2 = fig.subplots(2, 1, sharex=True)
+    for code, values in hierarchy.level('Region').iterrows():
+        ax1.plot(values.index, values.values, label=hierarchy.names[code])
+    ax1.set_ylabel('Carbon emissions')
+    ax1.set_title('Total carbon emission by region over the years')
+    ax1.legend()
+    for code, values in hierarchy.per_capita('Income group').iterrows():
+        ax2.plot(values.index, values.values, label=hierarchy.names[code])
+    ax2.set_ylabel('Carbon emissions per capita')
+    ax2.set_title('Carbon emission per capita by income group over the years\n'
+                  '(members counted in years with both emissions and population, former countries are in no income group)')
+    ax2.legend()
+    if hierarchy.unmapped:
+        ax1.text(0.01, 0.98, 'Not in any region: ' + ', '.join(hierarchy.unmapped), transform=ax1.transAxes, va='top')
+    return fig
+
+
+### Queue figure for writing into image file in background and return its path
+### Ticks and artists are checked before drawing
+def save_figure(fig, path):
+    rc = _figure_settings.get(fig)
+    with _settings(rc):
+        preflight(fig, os.path.basename(path))
+
+    def save(tmp_path):
+        with _settings(rc):
+            fig.savefig(tmp_path, format=os.path.splitext(path)[1][1:])
+    return get_writer().write(path, save)
+
+
+### Declare steps of every chart in the pipeline
+def build_pipeline(output_dir=OUTPUT_DIR, workers=4):
+    p = Pipeline(workers=workers)
+
+    ### Shared steps: load emissions, group them by Country and validate once
+    emissions = p.step(load_csv, EMISSIONS_CSV)
+    by_country = p.step(group_sum, 'Country', (*SOURCES, 'Total'), deps=[emissions])
+    by_country_errors = p.step(validate, tuple((c, 'int') for c in ('Total', *SOURCES)), deps=[by_country])
+
+    ### Shared steps: load auxiliary data
+    population = p.step(load_csv, POPULATION_CSV)
+    prices = p.step(load_csv, GAS_PRICE_CSV)
+    spend = p.step(load_csv, DRUG_SPENDING_CSV)
+
+    ### Shared steps: emissions by Country cleaned from errors in Total or in source columns
+    total = p.step(drop_errors, ('Total',), deps=[by_country, by_country_errors])
+    sources = p.step(drop_errors, SOURCES, deps=[by_country, by_country_errors])
+    total_sorted = p.step(top, ('Total',), 'Total', deps=[total])
+
+    charts = {}
+    charts['app1_pie'] = p.step(render_top10_pie, deps=[p.step(top, ('Total',), 'Total', 10, deps=[total])])
+    charts['app2_bar'] = p.step(render_sources_bar, deps=[p.step(top, SOURCES, 'Total', 50, deps=[sources])])
+    charts['app2_bar2'] = p.step(render_sources_barh, deps=[p.step(top, SOURCES, 'Total', 20, deps=[sources])])
+    charts['app3_bar'] = p.step(render_top10_by_source,
+                                deps=[p.step(drop_errors, deps=[by_country, by_country_errors])])
+    charts['app5_pie'] = p.step(render_top20_percent_pie, deps=[total_sorted])
+
+    ### app4: emissions merged with population
+    merged = p.step(merge_population, deps=[emissions, population])
+    errors = p.step(validate, (('Country', 'null'), ('Total', 'int'), ('Value', 'int'), ('Year', 'int')), deps=[merged])
+    charts['app4_scatter'] = p.step(render_population_scatter, deps=[p.step(drop_errors, deps=[merged, errors])])
+
+    ### app6: gas emissions merged with yearly mean gas price
+    gas = p.step(gas_fuel_by_year, deps=[emissions])
+    gas_errors = p.step(validate, (('Year', 'year'), ('Gas Fuel', 'float'), ('Country', 'null')), deps=[gas])
+    price = p.step(price_by_year, deps=[prices])
+    price_errors = p.step(validate, (('Year', 'year'), ('Price', 'float')), deps=[price])
+    gas_cleaned = p.step(drop_errors, deps=[gas, gas_errors])
+    gas_trend = p.step(fit_trends, ('Gas Fuel',), 'linear', GAS_TREND_START, None, TREND_HORIZON,
+                       deps=[p.step(to_int_year, deps=[gas_cleaned])])
+    charts['app6_plot'] = p.step(render_gas_price, deps=[p.step(merge_price, deps=[
+        gas_cleaned, p.step(drop_errors, deps=[price, price_errors])]), gas_trend])
+
+    ### app7 and app8: emissions and drug spending validated for Total and TOTAL_SPEND
+    emissions_errors = p.step(validate, (('Year', 'year'), ('Total', 'int'), ('Country', 'null')), deps=[emissions])
+    emissions_cleaned = p.step(drop_errors, ('Year', 'Total', 'Country'), deps=[emissions, emissions_errors])
+    spend_rules = (('TIME', 'year'), ('TOTAL_SPEND', 'int'), ('LOCATION', 'null'))
+    spend_countries = p.step(drug_spend_with_country, deps=[spend])
+    spend_countries_errors = p.step(validate, (*spend_rules, ('Country', 'null')), deps=[spend_countries])
+    charts['app7_plot'] = p.step(render_drug_spend_years, deps=[p.step(merge_drug_spend, deps=[
+        p.step(capitalize_country, deps=[emissions_cleaned]),
+        p.step(drop_errors, deps=[spend_countries, spend_countries_errors])])])
+    spend_errors = p.step(validate, spend_rules, deps=[spend])
+    total_trend = p.step(fit_trends, ('Total',), 'linear', DRUG_TREND_START, None, TREND_HORIZON, deps=[emissions_cleaned])
+    charts['app8_plot'] = p.step(render_drug_spend_countries,
+                                 deps=[emissions_cleaned, p.step(drop_errors, deps=[spend, spend_errors]), total_trend])
+
+    ### Regions and income groups: precomputed rollups of emissions and population
+    charts['regions_plot'] = p.step(render_regions, deps=[p.step(build_hierarchy, deps=[emissions, population])])
+
+    ### Image file of each chart is a target of the pipeline
+    for name, chart in charts.items():
+        p.target(name, p.step(save_figure, os.path.join(output_dir, f'{name}.png'), deps=[chart]))
+    return p
+
+
+### Render group of charts in worker process, loaded data comes from shared memory instead of csv files
+### Charts of one group share steps, which the worker pipeline computes once for all of them
+def render_in_worker(names):
+    p = build_pipeline()
+    for path, data in shared.datasets().items():
+        p.provide(p.step(load_csv, path), data)
+    results = p.run(names)
+    ### Pool workers do not run exit handlers reliably, images must be written before returning
+    flush()
+    return results
+
+### Render charts in worker processes, datasets are published once into shared memory
+### Charts sharing any step other than loading are rendered by the same worker, see Pipeline.groups
+def run_in_processes(pipeline, names, datasets, processes):
+    groups = pipeline.groups(names)
+    results = {}
+    with shared.publish(datasets) as published, \
+            Pool(processes, initializer=shared.init_worker, initargs=(published.descriptor,)) as pool:
+        for group_results in pool.map(render_in_worker, groups):
+            results.update(group_results)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Save charts of all app scripts as image files')
+    parser.add_argument('names', nargs='*', help='charts to regenerate, all charts by default')
+    parser.add_argument('--force', action='store_true', help='render charts even when their data did not change')
+    parser.add_argument('--processes', type=int, help='render charts in given number of worker processes')
+    args = parser.parse_args()
+
+    slices = chart_slices()
+    if args.names:
+        slices = {name: slices[name] for name in args.names}
+    pipeline = build_pipeline()
+    runner = None
+    if args.processes:
+        runner = lambda names, datasets: run_in_processes(pipeline, names, datasets, args.processes)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    rebuilt, reused = rebuild(pipeline, slices, OUTPUT_DIR, force=args.force, runner=runner)
+    for name in rebuilt:
+        print(f'{name}: rendered')
+    for name in reused:
+        print(f'{name}: unchanged')
@@ -0,0 +1,71 @@
+"""
+##############################################################################
+#######                 PROJECT NAME : CO2 EMISSIONS                   #######
+##############################################################################
+                                Synopsis:
+Module with precomputed cumulative sums along the year axis for every country and source.
+Total of any year range, for one country or for all countries, is two array reads and a subtraction,
+so rolling-window and sliding-range reports cost time proportional to number of windows, not to data size.
+"""
+
+### Import necessary libraries
+import numpy as np
+import pandas as pd
+from stages import SOURCES, country_year_matrix
+
+
+### Cumulative emissions index of (column x country x year)
+class YearRangeIndex:
+    def __init__(self, data, columns=(*SOURCES, 'Total')):
+        matrices = [country_year_matrix(data, column).fillna(0) for column in columns]
+        ### All matrices share the same countries and years as pivoted from the same data
+        self.columns = list(columns)
+        self.countries = matrices[0].index
+        self.years = matrices[0].columns.values
+        ### Prefix sums with leading zero, sums[c, n, i] is total of country n before i-th year
+        values = np.stack([m.values for m in matrices])
+        self.sums = np.zeros(values.shape[:2] + (values.shape[2] + 1,))
+        np.cumsum(values, axis=2, out=self.sums[:, :, 1:])
+
+    ### Position in prefix sums of the first year not lower than given year
+    def _position(self, year):
+        return int(np.clip(year - self.years[0], 0, len(self.years)))
+
+    ### Reversed ranges would give negative totals
+    @staticmethod
+    def _check_range(start, end):
+        if start is not None and end is not None and start > end:
+            raise ValueError(f'start year {start} is after end year {end}')
+
+    ### Positions in prefix sums of range, None is open bound (first or last year)
+    def _bounds(self, start, end):
+        self._check_range(start, end)
+        return (0 if start is None else self._position(start),
+                len(self.years) if end is None else self._position(end + 1))
+
+    ### Total of years from start to end (both included), for one country or pd.Series for all countries
+    def total(self, start=None, end=None, country=None, column='Total'):
+        s, e = self._bounds(start, end)
+        sums = self.sums[self.columns.index(column)]
+        if country is not None:
+            n = self.countries.get_loc(country)
+            return sums[n, e] - sums[n, s]
+        return pd.Series(sums[:, e] - sums[:, s], index=self.countries, name=column)
+
+    ### Totals of many year ranges given as (start, end) pairs, countries x ranges data frame
+    def ranges(self, ranges, column='Total'):
+        bounds = [self._bounds(start, end) for start, end in ranges]
+        starts = [s for s, _ in bounds]
+        ends = [e for _, e in bounds]
+        sums = self.sums[self.columns.index(column)]
+        return pd.DataFrame(sums[:, ends] - sums[:, starts], index=self.countries,
+                            columns=[f'{start}-{end}' for start, end in ranges])
+
+    ### Rolling totals over windows of given width, columns are last years of windows
+    def rolling(self, width, column='Total', step=1):
+        if width < 1 or step < 1:
+            raise ValueError(f'width and step must be at least 1, not {width} and {step}')
+        sums = self.sums[self.columns.index(column)]
+        ends = np.arange(width, len(self.years) + 1, step)
+        return pd.DataFrame(sums[:, ends] - sums[:, ends - width], index=self.countries,
+                            columns=self.years[ends - 1])
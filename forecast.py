@@ -0,0 +1,104 @@
+"""
+##############################################################################
+#######                 PROJECT NAME : CO2 EMISSIONS                   #######
+##############################################################################
+                                Synopsis:
+Module which fits linear, exponential and piecewise linear trends to emissions series of every country
+and source at once. Series are stacked into one (country x year) matrix and all least-squares problems
+are solved in one batched call, missing years are masked out of the fit.
+"""
+
+### Import necessary libraries
+import numpy as np
+import pandas as pd
+from stages import SOURCES, country_year_matrix
+
+### Supported kinds of trend
+KINDS = ('linear', 'exponential', 'piecewise')
+
+
+### Result of trend fitting, rows of all frames are (column, Country) pairs
+class Trend:
+    def __init__(self, kind, coefficients, fitted, projection):
+        self.kind = kind
+        ### Coefficients of basis functions for each series
+        self.coefficients = coefficients
+        ### Trend values for observed years and for projected years after the last one
+        self.fitted = fitted
+        self.projection = projection
+
+    ### Fitted values and projection of one series as two pd.Series indexed by year
+    def get(self, country, column='Total'):
+        return self.fitted.loc[(column, country)], self.projection.loc[(column, country)]
+
+
+### Basis functions evaluated for given years, years are shifted by origin to keep the system well conditioned
+def design(years, kind, origin, breakpoints=()):
+    t = np.asarray(years, dtype=float) - origin
+    columns = [np.ones_like(t), t]
+    if kind == 'piecewise':
+        ### Hinge function for each breakpoint lets slope change from that year
+        columns += [np.maximum(t - (b - origin), 0) for b in breakpoints]
+    return np.stack(columns, axis=1)
+
+
+### Batched weighted least squares, values and mask are (series x year), basis is (year x k)
+def solve(values, mask, basis):
+    weights = mask.astype(float)
+    values = np.where(mask, values, 0.0)
+    ### Normal equations of every series stacked into (series x k x k) and (series x k)
+    a = np.einsum('tk,nt,tl->nkl', basis, weights, basis)
+    b = np.einsum('tk,nt->nk', basis, weights * values)
+    ### pinv copes with singular systems of series with too few observed years
+    coefficients = np.einsum('nkl,nl->nk', np.linalg.pinv(a), b)
+    ### Series with fewer observations than coefficients have no trend
+    coefficients[weights.sum(axis=1) < basis.shape[1]] = np.nan
+    return coefficients
+
+
+### Fit trend of given kind to every country and column of the emissions data
+### start/end limit years used for the fit, horizon is number of projected years after end
+def fit_trends(data, columns=(*SOURCES, 'Total'), kind='linear', start=None, end=None, horizon=10, breakpoints=None):
+    if kind not in KINDS:
+        raise ValueError(f'kind must be one of {KINDS}, not {kind!r}')
+
+    ### Stack country x year matrices of all columns into one matrix
+    matrices = {column: country_year_matrix(data, column) for column in columns}
+    matrix = pd.concat(matrices, names=['column', 'Country'])
+    years = matrix.columns.values
+    start = years[0] if start is None else start
+    end = years[-1] if end is None else end
+
+    values = matrix.values.astype(float)
+    mask = ~np.isnan(values) & (years >= start) & (years <= end)
+    if kind == 'exponential':
+        ### Exponential trend is linear fit of logarithm, only positive values can be used
+        mask &= np.where(mask, values, 0) > 0
+        values = np.log(np.where(mask, values, 1))
+    if kind == 'piecewise' and breakpoints is None:
+        breakpoints = ((start + end) // 2,)
+    breakpoints = breakpoints or ()
+
+    basis = design(years, kind, start, breakpoints)
+    coefficients = solve(values, mask, basis)
+
+    ### Evaluate trend for fitted window and for projected years
+    fitted_years = years[(years >= start) & (years <= end)]
+    projected_years = np.arange(end + 1, end + 1 + horizon)
+    fitted = coefficients @ design(fitted_years, kind, start, breakpoints).T
+    projection = coefficients @ design(projected_years, kind, start, breakpoints).T
+    if kind == 'exponential':
+        fitted, projection = np.exp(fitted), np.exp(projection)
+
+    names = ['const', 'slope', *(f'break_{b}' for b in breakpoints)]
+    return Trend(kind,
+                 pd.DataFrame(coefficients, index=matrix.index, columns=names),
+                 pd.DataFrame(fitted, index=matrix.index, columns=fitted_years),
+                 pd.DataFrame(projection, index=matrix.index, columns=projected_years))
+
+
+### Overlay fitted trend and its projection on axis
+def plot_trend(ax, fitted, projection, color='k', label=None, x=None):
+    x = x or (lambda years: years)
+    ax.plot(x(fitted.index), fitted.values, color=color, linewidth=1, label=label)
+    ax.plot(x(projection.index), projection.values, color=color, linewidth=1, linestyle='--')
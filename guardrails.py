@@ -0,0 +1,139 @@
+"""
+##############################################################################
+#######                 PROJECT NAME : CO2 EMISSIONS                   #######
+##############################################################################
+                                Synopsis:
+Module which checks figures before drawing: number of ticks, tick labels and artists of each chart
+is estimated and clamped to configurable budgets (automatic locators, thinned labels and thinned points),
+so one bad parameter cannot turn a chart render into a multi-second operation.
+Charts which hit a limit are reported, charts with more bars than the budget are not rendered (BudgetError).
+"""
+
+### Import necessary libraries
+import math
+import threading
+from matplotlib.ticker import MaxNLocator, LogLocator, FixedLocator, FixedFormatter, FuncFormatter
+
+### Budgets per axis (ticks, labels) and per subplot (artists)
+BUDGETS = {
+    'ticks': 50,
+    'labels': 50,
+    'artists': 5000,
+}
+
+### Reports of charts which hit a limit, as (chart, message) pairs
+REPORTS = []
+_lock = threading.Lock()
+
+
+### Record and print that chart hit a limit
+def report(chart, message):
+    with _lock:
+        REPORTS.append((chart, message))
+    print(f'{chart}: {message}')
+
+
+### Automatic locator limited to given number of ticks, matching scale of the axis
+def _locator(axis, budget):
+    if axis.get_scale() == 'log':
+        return LogLocator(numticks=budget)
+    return MaxNLocator(budget)
+
+
+### Whether axis has labels set by set_xticklabels: fixed formatter, or function formatter
+### over fixed locator which matplotlib uses for labels of fixed ticks
+def _labelled(axis):
+    formatter = axis.get_major_formatter()
+    return isinstance(formatter, FixedFormatter) or (
+        isinstance(formatter, FuncFormatter) and isinstance(axis.get_major_locator(), FixedLocator))
+
+### Replace locator of axis by one limited to budget. Labels set by set_xticklabels belong to
+### current ticks, so every n-th tick is kept with its label instead. Returns description of the replacement
+def _clamp_ticks(axis, budget):
+    if _labelled(axis):
+        locs = list(axis.get_majorticklocs())
+        labels = axis.get_major_formatter().format_ticks(locs)
+        step = max(math.ceil(len(locs) / budget), 1)
+        axis.set_major_locator(FixedLocator(locs[::step]))
+        axis.set_major_formatter(FixedFormatter(labels[::step]))
+        return f'every {step}. tick kept with its label'
+    axis.set_major_locator(_locator(axis, budget))
+    return 'using automatic locator'
+
+
+### Set ticks of axis, too many ticks are replaced by automatic locator
+def set_ticks(ax, ticks, axis='y', chart=None, budget=None):
+    budget = budget or BUDGETS['ticks']
+    target = getattr(ax, f'{axis}axis')
+    if len(ticks) > budget:
+        report(chart, f'{len(ticks)} {axis} ticks over budget {budget}, {_clamp_ticks(target, budget)}')
+    else:
+        target.set_ticks(ticks)
+
+
+### Number of artists of subplot, points of collections (e.g. scatter) are counted one by one
+def count_artists(ax):
+    points = sum(len(c.get_offsets()) for c in ax.collections)
+    return len(ax.patches) + len(ax.lines) + len(ax.texts) + points
+
+
+### Keep every step-th point of collection with its values, colors and sizes
+def _thin(collection, step):
+    count = len(collection.get_offsets())
+    collection.set_offsets(collection.get_offsets()[::step])
+    if collection.get_array() is not None:
+        collection.set_array(collection.get_array()[::step])
+    properties = [(collection.get_facecolor, collection.set_facecolor), (collection.get_edgecolor, collection.set_edgecolor)]
+    if hasattr(collection, 'get_sizes'):
+        properties.append((collection.get_sizes, collection.set_sizes))
+    for get, set_ in properties:
+        values = get()
+        if len(values) == count:
+            set_(values[::step])
+
+### Chart whose bars do not fit the artist budget
+class BudgetError(ValueError):
+    pass
+
+### Reduce artists of subplot to budget: points of collections are thinned evenly, lines and texts are kept.
+### Bars (patches) are never dropped, since missing bars change what the chart says: subplot with more bars
+### than fit the budget raises BudgetError. Returns description of the reduction
+def reduce_artists(ax, budget):
+    room = max(budget - len(ax.lines) - len(ax.texts), 0)
+    patches = len(ax.patches)
+    if patches > room:
+        raise BudgetError(f'{patches} bars over budget {room}, chart not rendered')
+    points = sum(len(c.get_offsets()) for c in ax.collections)
+    step = math.ceil(points / max(room - patches, 1)) if points else 1
+    if step > 1:
+        for collection in ax.collections:
+            _thin(collection, step)
+        return f'every {step}. of {points} points kept'
+    return 'nothing to reduce'
+
+
+### Check every subplot of figure before drawing and clamp ticks and artists to budgets
+### Returns number of limits hit by the figure
+def preflight(fig, chart=None, budgets=None):
+    budgets = {**BUDGETS, **(budgets or {})}
+    hits = 0
+    for i, ax in enumerate(fig.axes):
+        for name in ('x', 'y'):
+            axis = getattr(ax, f'{name}axis')
+            ticks = len(axis.get_majorticklocs())
+            ### Ticks with labels set by set_xticklabels are limited by budget of labels
+            budget = budgets['labels'] if _labelled(axis) else budgets['ticks']
+            if ticks > budget:
+                report(chart, f'subplot {i}: {ticks} {name} ticks over budget {budget}, {_clamp_ticks(axis, budget)}')
+                hits += 1
+        artists = count_artists(ax)
+        if artists > budgets['artists']:
+            ### Rasterizing would not help image output, every artist is still drawn, so artists are removed
+            try:
+                reduction = reduce_artists(ax, budgets['artists'])
+            except BudgetError as error:
+                report(chart, f'subplot {i}: {error}')
+                raise
+            report(chart, f'subplot {i}: {artists} artists over budget {budgets["artists"]}, {reduction}')
+            hits += 1
+    return hits
@@ -0,0 +1,109 @@
+"""
+##############################################################################
+#######                 PROJECT NAME : CO2 EMISSIONS                   #######
+##############################################################################
+                                Synopsis:
+Module which rolls emissions and population of countries up to World Bank regions, income groups and World.
+Membership of countries is kept in country_groups.csv with codes from 'Country Code' column of population data
+(regions and income groups as classified by the World Bank in July 2019). Emissions entities without World Bank name
+(former countries such as USSR, territories, parts of present countries) get codes from entity_codes.csv;
+former countries belong to their region but to no income group. Sums at every level of the hierarchy
+are precomputed in one segmented reduction over (country x year) arrays, so region queries are lookups.
+"""
+
+### Import necessary libraries
+import numpy as np
+import pandas as pd
+from stages import SOURCES, country_year_matrix
+from reconcile import apply_overrides
+
+### Membership table with columns 'Country Code', 'Group Code' and 'Level'
+GROUPS_CSV = 'country_groups.csv'
+### Codes of emissions entities without World Bank name, columns 'Country' and 'Country Code'
+CODES_CSV = 'entity_codes.csv'
+### Levels of the hierarchy
+LEVELS = ('World', 'Region', 'Income group')
+
+
+### Precomputed sums of groups, measures are emissions columns and 'Population'
+class Hierarchy:
+    def __init__(self, emissions, population, groups=None, codes=None, columns=(*SOURCES, 'Total')):
+        groups = pd.read_csv(GROUPS_CSV) if groups is None else groups
+        entity_codes = pd.read_csv(CODES_CSV) if codes is None else codes
+        codes = population[['Country Name', 'Country Code']].drop_duplicates()
+        self.names = dict(zip(codes['Country Code'], codes['Country Name']))
+
+        ### Emissions names mapped to codes through matching World Bank names, e.g. 'UNITED STATES OF AMERICA' -> 'USA'
+        matched = apply_overrides(codes['Country Name'], emissions['Country'], 'population').str.upper()
+        code_of = dict(zip(matched, codes['Country Code']))
+        code_of.update(zip(entity_codes['Country'], entity_codes['Country Code']))
+        emissions = emissions.assign(**{'Country Code': emissions['Country'].map(code_of)})
+        ### Entities without code (e.g. ANTARCTIC FISHERIES) are left out of all groups
+        self.unmapped = sorted(emissions.loc[emissions['Country Code'].isna(), 'Country'].unique())
+        emissions = emissions.dropna(subset=['Country Code'])
+
+        ### (country x year x measure) array of all countries in membership table
+        matrices = [country_year_matrix(emissions, column, by='Country Code') for column in columns]
+        matrices.append(country_year_matrix(population, 'Value', by='Country Code'))
+        self.measures = [*columns, 'Population']
+        self.countries = pd.Index(sorted(groups['Country Code'].unique()))
+        self.years = np.arange(min(m.columns.min() for m in matrices), max(m.columns.max() for m in matrices) + 1)
+        values = np.stack([m.reindex(index=self.countries, columns=self.years).values for m in matrices], axis=2)
+        ### Years with data of each country and measure
+        self.present = ~np.isnan(values)
+        values = np.nan_to_num(values)
+        self.values = values
+        ### Years covered by each measure, sums outside of them are missing rather than zero
+        self.observed = {measure: (m.columns.min(), m.columns.max()) for measure, m in zip(self.measures, matrices)}
+
+        ### Members sorted by group, so every group is one contiguous segment of rows
+        groups = groups[groups['Country Code'].isin(self.countries)].sort_values(['Group Code', 'Country Code'])
+        rows = self.countries.get_indexer(groups['Country Code'])
+        codes = groups['Group Code'].values
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        self.groups = pd.Index(codes[starts])
+        self.levels = dict(zip(groups['Group Code'], groups['Level']))
+        self.totals = np.add.reduceat(values[rows], starts, axis=0)
+        ### Emissions measures and population of members having both in a year (emissions measures first,
+        ### then population paired with each of them), so per capita values do not divide emissions
+        ### by population of members without emissions data and the other way round
+        both = self.present[:, :, :-1] & self.present[:, :, -1:]
+        paired = np.concatenate([np.where(both, values[:, :, :-1], 0), np.where(both, values[:, :, -1:], 0)], axis=2)
+        self.paired = np.add.reduceat(paired[rows], starts, axis=0)
+
+    ### Series over years of one group (or one country) and measure, or single value for given year
+    def get(self, code, measure='Total', year=None):
+        if code in self.groups:
+            data = self.totals[self.groups.get_loc(code)]
+        else:
+            data = self.values[self.countries.get_loc(code)]
+        series = self._mask(pd.Series(data[:, self.measures.index(measure)], index=self.years, name=code), measure)
+        return series if year is None else series[year]
+
+    ### Groups of one level x years data frame of measure, e.g. level('Region')
+    def level(self, level, measure='Total'):
+        codes = [code for code in self.groups if self.levels[code] == level]
+        data = self.totals[self.groups.get_indexer(codes), :, self.measures.index(measure)]
+        return self._mask(pd.DataFrame(data, index=codes, columns=self.years), measure)
+
+    ### Years outside of years covered by measure set to NaN
+    def _mask(self, data, measure):
+        first, last = self.observed[measure]
+        covered = (self.years >= first) & (self.years <= last)
+        return data.where(np.broadcast_to(covered, data.shape))
+
+    ### Measure per person of group members, e.g. per_capita('Income group')
+    ### In every year only members with both measure and population data are counted
+    def per_capita(self, level, measure='Total'):
+        codes = [code for code in self.groups if self.levels[code] == level]
+        rows = self.groups.get_indexer(codes)
+        column = self.measures.index(measure)
+        values = self.paired[rows, :, column]
+        population = self.paired[rows, :, len(self.measures) - 1 + column]
+        data = pd.DataFrame(values / np.where(population > 0, population, np.nan), index=codes, columns=self.years)
+        return self._mask(data, measure)
+
+
+### Build hierarchy, used as pipeline step
+def build_hierarchy(emissions, population):
+    return Hierarchy(emissions, population)
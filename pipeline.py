@@ -0,0 +1,120 @@
+"""
+##############################################################################
+#######                 PROJECT NAME : CO2 EMISSIONS                   #######
+##############################################################################
+                                Synopsis:
+Module which runs chart steps (load, validate, transform, render) as nodes of a dependency graph.
+Identical nodes declared by different charts are merged, their outputs are memoized in memory
+and independent branches of the graph are executed in parallel on a worker pool.
+"""
+
+### Import necessary libraries
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+### Single step of a chart pipeline
+### Node is identified by its function, arguments and dependencies, so two charts
+### declaring the same step (e.g. loading the same csv file) produce equal keys
+class Node:
+    def __init__(self, func, *args, deps=(), name=None):
+        self.func = func
+        self.args = args
+        self.deps = tuple(deps)
+        self.name = name or func.__name__
+        self.key = (func.__module__, func.__qualname__, args, tuple(d.key for d in self.deps))
+
+    def __repr__(self):
+        return f'Node({self.name})'
+
+
+### Dependency graph scheduler
+class Pipeline:
+    def __init__(self, workers=4):
+        self.workers = workers
+        ### Merged nodes by key, memoized outputs by key and named targets
+        self.nodes = {}
+        self.results = {}
+        self.targets = {}
+
+    ### Register node with all its dependencies and return the merged instance
+    def add(self, node):
+        if node.key in self.nodes:
+            return self.nodes[node.key]
+        node.deps = tuple(self.add(dep) for dep in node.deps)
+        self.nodes[node.key] = node
+        return node
+
+    ### Shortcut which creates and registers node in one call
+    def step(self, func, *args, deps=(), name=None):
+        return self.add(Node(func, *args, deps=deps, name=name))
+
+    ### Mark node as a named output of the pipeline
+    def target(self, name, node):
+        self.targets[name] = self.add(node)
+        return self.targets[name]
+
+    ### Memoize already computed output of node, e.g. data loaded outside of the pipeline
+    def provide(self, node, value):
+        node = self.add(node)
+        self.results[node.key] = value
+        return node
+
+    ### Collect nodes needed to compute given targets which are not memoized yet
+    def _pending(self, names):
+        pending = {}
+        stack = [self.targets[name] for name in names]
+        while stack:
+            node = stack.pop()
+            if node.key in pending or node.key in self.results:
+                continue
+            pending[node.key] = node
+            stack.extend(node.deps)
+        return pending
+
+    ### Split target names into groups sharing no pending node, so groups can run in separate processes
+    ### without computing any node twice
+    def groups(self, names=None):
+        names = list(self.targets) if names is None else list(names)
+        groups = []
+        for name in names:
+            keys = set(self._pending([name]))
+            shared = [group for group in groups if group[1] & keys]
+            groups = [group for group in groups if group not in shared]
+            groups.append(([n for group in shared for n in group[0]] + [name], keys.union(*(group[1] for group in shared))))
+        return [sorted(group, key=names.index) for group, _ in groups]
+
+    ### Execute single node with outputs of its dependencies as first arguments
+    def _call(self, node):
+        inputs = [self.results[dep.key] for dep in node.deps]
+        return node.func(*inputs, *node.args)
+
+    ### Run pipeline for given target names (all targets by default) and return their outputs
+    def run(self, names=None):
+        names = list(self.targets) if names is None else list(names)
+        pending = self._pending(names)
+        ### Number of unfinished dependencies for each pending node and reverse edges
+        waiting = {key: sum(dep.key in pending for dep in node.deps) for key, node in pending.items()}
+        children = {key: [] for key in pending}
+        for key, node in pending.items():
+            for dep in node.deps:
+                if dep.key in pending:
+                    children[dep.key].append(key)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            running = {}
+            ready = [key for key, count in waiting.items() if count == 0]
+            while ready or running:
+                for key in ready:
+                    running[pool.submit(self._call, pending[key])] = key
+                ready = []
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = running.pop(future)
+                    ### Re-raise error of a failed node
+                    self.results[key] = future.result()
+                    for child in children[key]:
+                        waiting[child] -= 1
+                        if waiting[child] == 0:
+                            ready.append(child)
+
+        return {name: self.results[self.targets[name].key] for name in names}
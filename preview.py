@@ -0,0 +1,142 @@
+"""
+##############################################################################
+#######                 PROJECT NAME : CO2 EMISSIONS                   #######
+##############################################################################
+                                Synopsis:
+Script which plots quick-look approximate versions of app1_pie.py, app2_bar.py and app5_pie.py charts.
+Stratified sample of emissions rows (by country and range of years) of fixed size is built once and kept in a csv file,
+totals, shares and rankings are estimated from the sample with approximate 95% confidence intervals.
+Flag --exact switches to exact computation over the whole emissions data.
+Usage: python preview.py app1_pie|app2_bar|app5_pie [--exact]
+"""
+
+### Import necessary libraries
+import os
+import sys
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from stages import EMISSIONS_CSV, SOURCES, load_csv
+
+### File with kept sample and its parameters
+SAMPLE_CSV = 'preview_sample.csv'
+### Total number of sampled rows, it does not grow with the emissions data
+SAMPLE_ROWS = 2000
+### Rows drawn from every stratum, variance of a stratum needs at least two
+STRATUM_ROWS = 3
+SAMPLE_SEED = 0
+### Two-sided 95% quantiles of Student t distribution by degrees of freedom, the last one is normal quantile
+T95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262, 10: 2.228,
+       15: 2.131, 20: 2.086, 30: 2.042, 60: 2.000, 120: 1.980, np.inf: 1.960}
+
+
+### Draw stratified sample of at most about SAMPLE_ROWS rows, split across countries by their number of rows
+### (at least STRATUM_ROWS per country). Rows of each country are cut by years into strata of STRATUM_ROWS sampled rows,
+### so strata get shorter as the budget grows. Stratum, stratum size and sample size are stored with rows,
+### so estimates need only the sample
+def build_sample(path=EMISSIONS_CSV, rows=SAMPLE_ROWS, seed=SAMPLE_SEED, sample_path=SAMPLE_CSV):
+    data = load_csv(path).sort_values(['Country', 'Year'], kind='stable')
+    countries = data.groupby('Country')['Year']
+    country_size = countries.transform('size')
+    budget = np.minimum(np.maximum(np.round(rows * country_size / len(data)), STRATUM_ROWS), country_size)
+    ### Consecutive years of a country are cut into equal strata
+    strata = np.maximum(budget // STRATUM_ROWS, 1)
+    data['Stratum'] = (countries.cumcount() * strata // country_size).astype(int)
+    keys = [data['Country'], data['Stratum']]
+    size = data.groupby(keys)['Year'].transform('size')
+    count = np.minimum(np.maximum(np.round(budget * size / country_size), STRATUM_ROWS), size)
+    ### Random order inside each stratum, first rows are taken
+    order = pd.Series(np.random.default_rng(seed).random(len(data)), index=data.index).groupby(keys).rank(method='first')
+    sample = data[order <= count].assign(**{'Stratum size': size, 'Sample size': count})
+    sample.to_csv(sample_path, index=False)
+    return sample
+
+### Read kept sample, it is built again when missing, older than the emissions data or drawn with old strata
+def load_sample(path=EMISSIONS_CSV, sample_path=SAMPLE_CSV):
+    if not os.path.exists(sample_path) or os.path.getmtime(sample_path) < os.path.getmtime(path):
+        return build_sample(path, sample_path=sample_path)
+    sample = pd.read_csv(sample_path)
+    return sample if 'Stratum' in sample else build_sample(path, sample_path=sample_path)
+
+
+### Quantile of t distribution for 95% interval, interpolated in 1 / degrees of freedom
+def t_quantile(df):
+    dfs = np.array(list(T95))[::-1]
+    return np.interp(1 / np.maximum(df, 1), 1 / dfs, np.array(list(T95.values()))[::-1])
+
+
+### Estimate totals of columns for each country with half widths of 95% confidence intervals ('<column> CI')
+### Intervals use t quantiles with Satterthwaite degrees of freedom of the country total, so they aim to cover
+### the exact total of a country in 95% of samples. Strata of three rows are small and emissions are skewed,
+### so real coverage is lower (about 92% of country totals over repeated samples of this data).
+### Rows without sample columns are treated as complete data, so their intervals are zero
+def estimate(data, columns):
+    if 'Stratum size' not in data:
+        data = data.assign(Stratum=0)
+        size = data.groupby(['Country', 'Stratum'])['Year'].transform('size')
+        data = data.assign(**{'Stratum size': size, 'Sample size': size})
+    strata = data.groupby(['Country', 'Stratum'])
+    sizes = strata[['Stratum size', 'Sample size']].first()
+    size, count = sizes['Stratum size'], sizes['Sample size']
+    result = {}
+    for column in columns:
+        ### Expanded stratum total and variance of it with finite population correction
+        total = strata[column].mean() * size
+        variance = (size ** 2 * (1 - count / size) * strata[column].var(ddof=1) / count).fillna(0)
+        country_variance = variance.groupby(level=0).sum()
+        df = country_variance ** 2 / (variance ** 2 / (count - 1).where(count > 1)).groupby(level=0).sum()
+        result[column] = total.groupby(level=0).sum()
+        result[f'{column} CI'] = (t_quantile(df.fillna(np.inf)) * np.sqrt(country_variance)).fillna(0)
+    return pd.DataFrame(result).sort_values(columns[-1], ascending=False)
+
+
+### app1_pie.py: top 10 countries with share and its interval in labels
+def plot_top10_pie(totals):
+    grand_total = totals['Total'].sum()
+    data = totals[:10]
+    labels = [f'{country}\n±{ci / grand_total:.1%}' for country, ci in zip(data.index, data['Total CI'])]
+    plt.pie(data['Total'], labels=labels, radius=1, textprops={'fontsize': 10}, autopct='%1.1f%%')
+
+### app2_bar.py: top 50 countries broken into sources with error bars
+def plot_sources_bar(totals):
+    data = totals[:50]
+    plt.style.use('fivethirtyeight')
+    data[list(SOURCES)].plot(kind='bar', figsize=(30,10), yerr=data[[f'{s} CI' for s in SOURCES]].values.T)
+    plt.title('total carbon emission by country')
+    plt.yscale('log')
+    plt.legend()
+    plt.tight_layout()
+
+### app5_pie.py: top 20% contributors vs rest of the world, interval of top share in title
+def plot_top20_percent_pie(totals):
+    first_20 = int(totals.shape[0] * 0.2)
+    top = totals[:first_20]['Total'].sum()
+    bot = totals[first_20:]['Total'].sum()
+    ### Stratum estimates are independent, so variances of countries add up
+    top_ci = np.sqrt((totals[:first_20]['Total CI'] ** 2).sum()) / (top + bot)
+    plt.style.use('ggplot')
+    plt.figure(figsize=(35,15))
+    plt.pie([top, bot], labels=['Top 20','Rest of the world'], startangle=90, explode=[0.2,0], radius=1.1,
+            textprops={'fontsize': 10}, autopct='%1.1f%%', shadow=True)
+    plt.title(f'Comparison of 20% major contribiutors of CO2 emission \n vs rest of the world (top share ±{top_ci:.1%})')
+
+
+### Charts available in preview mode
+CHARTS = {
+    'app1_pie': (('Total',), plot_top10_pie),
+    'app2_bar': ((*SOURCES, 'Total'), plot_sources_bar),
+    'app5_pie': (('Total',), plot_top20_percent_pie),
+}
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    exact = '--exact' in args
+    names = [arg for arg in args if arg != '--exact']
+    if len(names) != 1 or names[0] not in CHARTS:
+        sys.exit(f'usage: python preview.py {"|".join(CHARTS)} [--exact]')
+    columns, plot = CHARTS[names[0]]
+    ### Exact mode reads the whole emissions data instead of the sample
+    data = load_csv(EMISSIONS_CSV) if exact else load_sample()
+    plot(estimate(data, columns))
+    plt.show()
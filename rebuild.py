@@ -0,0 +1,99 @@
+"""
+##############################################################################
+#######                 PROJECT NAME : CO2 EMISSIONS                   #######
+##############################################################################
+                                Synopsis:
+Module which tracks exact slice of data (countries, years and columns of each csv file) read by every chart,
+fingerprints it and after data refresh re-renders only charts whose fingerprint changed.
+Image files of all other charts are reused. Fingerprints of the last build are kept in a json manifest.
+"""
+
+### Import necessary libraries
+import os
+import json
+import hashlib
+import pandas as pd
+from stages import load_csv
+from writer import flush
+
+### Manifest file in the output directory
+MANIFEST = 'fingerprints.json'
+
+
+### Slice of one csv file read by a chart or by a panel of a chart
+### countries and years are collections of values (None means all), columns are columns read by the chart
+class Slice:
+    def __init__(self, path, columns, countries=None, years=None, country_column='Country', year_column='Year'):
+        self.path = path
+        self.columns = tuple(columns)
+        self.countries = None if countries is None else tuple(countries)
+        self.years = None if years is None else tuple(years)
+        self.country_column = country_column
+        self.year_column = year_column
+
+    ### Select rows and columns of the slice
+    def select(self, data):
+        rows = pd.Series(True, index=data.index)
+        if self.countries is not None:
+            rows &= data[self.country_column].isin(self.countries)
+        if self.years is not None:
+            rows &= data[self.year_column].isin(self.years)
+        return data.loc[rows, list(self.columns)]
+
+    ### Hash of the slice definition and of the values in it
+    def fingerprint(self, data):
+        digest = hashlib.sha1(repr((self.path, self.columns, self.countries, self.years)).encode())
+        digest.update(pd.util.hash_pandas_object(self.select(data), index=False).values.tobytes())
+        return digest.hexdigest()
+
+
+### Fingerprint of a chart combines fingerprints of all its slices
+def fingerprint(slices, datasets):
+    digest = hashlib.sha1()
+    for s in slices:
+        digest.update(s.fingerprint(datasets[s.path]).encode())
+    return digest.hexdigest()
+
+
+### Read fingerprints of the last build
+def read_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+### Save fingerprints of the current build
+def write_manifest(output_dir, fingerprints):
+    path = os.path.join(output_dir, MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(fingerprints, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+### Re-render only targets of the pipeline whose slices changed since the last build or whose image is missing
+### slices maps target name to list of Slice, target writes image '<name>.png' into output directory
+### Changed targets are run by runner(names, datasets) when given, e.g. in worker processes
+### Returns names of rebuilt and reused targets
+def rebuild(pipeline, slices, output_dir, force=False, runner=None):
+    ### Each csv file is loaded once, loaded data is handed to the pipeline so charts do not read it again
+    paths = {s.path for chart_slices in slices.values() for s in chart_slices}
+    datasets = {path: load_csv(path) for path in paths}
+    for path, data in datasets.items():
+        pipeline.provide(pipeline.step(load_csv, path), data)
+
+    previous = read_manifest(output_dir)
+    current = {name: fingerprint(chart_slices, datasets) for name, chart_slices in slices.items()}
+    changed = [name for name in current
+               if force or previous.get(name) != current[name] or not os.path.exists(os.path.join(output_dir, f'{name}.png'))]
+    reused = [name for name in current if name not in changed]
+
+    if changed and runner is not None:
+        runner(changed, datasets)
+    elif changed:
+        pipeline.run(changed)
+    ### Images written in background must be on disk before their fingerprints are recorded
+    flush()
+    ### Keep fingerprints of charts not tracked in this build
+    write_manifest(output_dir, {**previous, **current})
+    return changed, reused
@@ -0,0 +1,122 @@
+"""
+##############################################################################
+#######                 PROJECT NAME : CO2 EMISSIONS                   #######
+##############################################################################
+                                Synopsis:
+Module which reconciles country names between datasets, e.g. 'UNITED STATES OF AMERICA' vs 'United States'.
+Unmatched names are looked up in character n-gram inverted index, so only names sharing n-grams are scored
+instead of comparing all pairs. Accepted matches are kept in override table used by joins.
+Run this script to print proposed matches between emissions and population names, with --save to accept best ones.
+"""
+
+### Import necessary libraries
+import os
+import re
+import sys
+from collections import Counter, defaultdict
+import pandas as pd
+
+### Persisted override table of accepted matches
+OVERRIDES_CSV = 'country_overrides.csv'
+### Length of n-grams
+NGRAM = 3
+### n-grams shared by more names than this are too common to narrow down candidates and are skipped
+MAX_POSTINGS = 500
+### Proposals scoring below this are dropped
+MIN_SCORE = 0.5
+### Proposals scoring at least this are accepted into override table with --save, others need manual review
+ACCEPT_SCORE = 0.75
+
+
+### Normalize name for comparison, e.g. 'Korea, Dem. People’s Rep.' -> 'KOREA DEM PEOPLE S REP'
+def normalize(name):
+    name = str(name).upper().replace('&', ' AND ')
+    return ' '.join(re.sub(r'[^0-9A-Z]+', ' ', name).split())
+
+### Character n-grams of normalized name, padded so first and last letters count as well
+def ngrams(name, n=NGRAM):
+    padded = f' {name} '
+    return {padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))}
+
+
+### Inverted index of n-grams of names
+class NgramIndex:
+    def __init__(self, names, n=NGRAM):
+        self.n = n
+        self.names = list(names)
+        self.grams = [ngrams(normalize(name), n) for name in self.names]
+        self.postings = defaultdict(list)
+        for i, grams in enumerate(self.grams):
+            for gram in grams:
+                self.postings[gram].append(i)
+
+    ### Best scoring names sharing n-grams with given name, list of (name, score) pairs
+    def candidates(self, name, limit=3, min_score=MIN_SCORE):
+        grams = ngrams(normalize(name), self.n)
+        shared = Counter()
+        for gram in grams:
+            postings = self.postings.get(gram, ())
+            if len(postings) <= MAX_POSTINGS:
+                shared.update(postings)
+        scored = []
+        for i, count in shared.items():
+            ### Dice coefficient rewards similar names, containment rewards short names inside long ones ('RUSSIA')
+            dice = 2 * count / (len(grams) + len(self.grams[i]))
+            containment = count / min(len(grams), len(self.grams[i]))
+            score = (dice + containment) / 2
+            if score >= min_score:
+                scored.append((self.names[i], score))
+        return sorted(scored, key=lambda pair: -pair[1])[:limit]
+
+
+### Read override table as {(dataset, name in dataset): matching name in reference (left) dataset}
+def load_overrides(path=OVERRIDES_CSV):
+    if not os.path.exists(path):
+        return {}
+    table = pd.read_csv(path)
+    return {(dataset, name): match for dataset, name, match in table[['Dataset', 'Name', 'Match']].values}
+
+### Save override table
+def save_overrides(overrides, path=OVERRIDES_CSV):
+    rows = [(dataset, name, match) for (dataset, name), match in sorted(overrides.items())]
+    pd.DataFrame(rows, columns=['Dataset', 'Name', 'Match']).to_csv(path, index=False)
+
+
+### Propose matches for names of right dataset not found in left dataset
+### dataset labels the pair of datasets in override table, returns data frame of proposals
+def propose(left, right, dataset, overrides=None, limit=3):
+    overrides = load_overrides() if overrides is None else overrides
+    left_names = {normalize(name): name for name in set(left)}
+    matched = {name for name in set(right) if normalize(name) in left_names or (dataset, name) in overrides}
+    used = {left_names[normalize(name)] for name in matched if normalize(name) in left_names}
+    used |= {overrides[(dataset, name)] for name in matched if (dataset, name) in overrides}
+    ### Only names without a match on either side are indexed and looked up
+    index = NgramIndex(sorted(set(left) - used))
+    rows = []
+    for name in sorted(set(right) - matched):
+        for candidate, score in index.candidates(name, limit):
+            rows.append((name, candidate, round(score, 3)))
+    return pd.DataFrame(rows, columns=['Right', 'Left', 'Score'])
+
+
+### Map names of right dataset onto names of left dataset by exact normalized match or override table
+### Names without a match are returned unchanged, so inner joins still drop them
+def apply_overrides(names, left, dataset, overrides=None):
+    overrides = load_overrides() if overrides is None else overrides
+    left_names = {normalize(name): name for name in set(left)}
+    mapping = {name: overrides.get((dataset, name), left_names.get(normalize(name), name)) for name in set(names)}
+    return names.map(mapping)
+
+
+if __name__ == '__main__':
+    from stages import EMISSIONS_CSV, POPULATION_CSV, load_csv
+    left = load_csv(EMISSIONS_CSV, ('Country',))['Country']
+    right = load_csv(POPULATION_CSV, ('Country Name',))['Country Name']
+    proposals = propose(left, right, 'population')
+    print(proposals.to_string(index=False))
+    ### Accept best proposal of every name into override table
+    if '--save' in sys.argv[1:]:
+        overrides = load_overrides()
+        for name, group in proposals[proposals['Score'] >= ACCEPT_SCORE].groupby('Right'):
+            overrides[('population', name)] = group.sort_values('Score', ascending=False)['Left'].iloc[0]
+        save_overrides(overrides)
@@ -0,0 +1,144 @@
+"""
+##############################################################################
+#######                 PROJECT NAME : CO2 EMISSIONS                   #######
+##############################################################################
+                                Synopsis:
+Module which publishes loaded datasets once into multiprocessing.shared_memory, so worker processes
+attach to them as zero-copy NumPy arrays and pandas columns instead of parsing csv files or unpickling data frames.
+Numeric columns of one dtype share one 2-D block laid out as pandas keeps consolidated columns, so attached
+data frames are built directly over the blocks and are already consolidated.
+Text columns are stored as categorical codes, their categories travel with the small picklable descriptor.
+"""
+
+### Import necessary libraries
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+
+### Datasets attached in the current worker process and their shared memory blocks, which must stay open
+_attached = {}
+_blocks = []
+
+
+### Copy array into new shared memory block
+def _share(array, blocks):
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+    blocks.append(block)
+    return {'name': block.name, 'dtype': array.dtype.str, 'shape': array.shape}
+
+### Array view of shared memory block described by _share
+def _view(spec, blocks):
+    block = shared_memory.SharedMemory(name=spec['name'])
+    blocks.append(block)
+    return np.ndarray(spec['shape'], dtype=np.dtype(spec['dtype']), buffer=block.buf)
+
+
+### Data frame built directly over (array, column positions) blocks, arrays are used as they are
+### Numeric arrays are 2-D (columns x rows), categorical arrays hold one column
+def _from_blocks(blocks, index, columns):
+    try:
+        from pandas.api.internals import create_dataframe_from_blocks
+    except ImportError:
+        ### pandas before 3.0 has no public constructor, its block manager is used directly
+        from pandas.core.internals import BlockManager
+        from pandas.core.internals.api import make_block
+        manager = BlockManager([make_block(values, placement=placement, ndim=2) for values, placement in blocks], [columns, index])
+        return pd.DataFrame._from_mgr(manager, manager.axes) if hasattr(pd.DataFrame, '_from_mgr') else pd.DataFrame(manager)
+    return create_dataframe_from_blocks(blocks, index, columns)
+
+### Array behind column, codes of categorical columns
+def _values(series):
+    return series.array.codes if isinstance(series.dtype, pd.CategoricalDtype) else series.to_numpy()
+
+
+### Datasets published by the parent process, it owns the shared memory blocks and removes them on close
+### Raises RuntimeError when attached columns would not be views of shared memory, before any worker starts
+class SharedDatasets:
+    def __init__(self, datasets):
+        self.blocks = []
+        ### Descriptor is passed to workers, it holds only names of blocks, dtypes, column positions and categories
+        self.descriptor = {}
+        try:
+            for key, data in datasets.items():
+                self.descriptor[key] = self._publish(data)
+            self._check()
+        except Exception:
+            self.close()
+            raise
+
+    ### Share one dataset, numeric columns are grouped into one block per dtype
+    def _publish(self, data):
+        blocks = []
+        numeric = {}
+        for i, column in enumerate(data.columns):
+            values = data.iloc[:, i]
+            if values.dtype.kind in 'biuf':
+                numeric.setdefault(values.dtype, []).append(i)
+            else:
+                categorical = pd.Categorical(values)
+                blocks.append((_share(categorical.codes, self.blocks), [i], list(categorical.categories)))
+        for dtype, positions in numeric.items():
+            array = np.ascontiguousarray(np.stack([data.iloc[:, i].to_numpy() for i in positions]))
+            blocks.append((_share(array, self.blocks), positions, None))
+        return {'rows': len(data), 'columns': list(data.columns), 'blocks': blocks}
+
+    ### Attach datasets in this process as workers will and check every column is a view of its block
+    def _check(self):
+        blocks = []
+        for key, spec in self.descriptor.items():
+            data, arrays = _attach_frame(spec, blocks)
+            copied = [data.columns[i] for (_, positions, _), array in zip(spec['blocks'], arrays)
+                      for i in positions if not np.shares_memory(_values(data.iloc[:, i]), array)]
+            if copied:
+                raise RuntimeError(f'{key}: columns {copied} are copied from shared memory by pandas {pd.__version__}')
+        del data, arrays
+        for block in blocks:
+            block.close()
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+### Publish dictionary of data frames into shared memory
+def publish(datasets):
+    return SharedDatasets(datasets)
+
+
+### Data frame of one published dataset and read only arrays of its blocks
+def _attach_frame(spec, blocks):
+    arrays = []
+    frame_blocks = []
+    for block, positions, categories in spec['blocks']:
+        array = _view(block, blocks)
+        ### Read only views protect data shared with other workers
+        array.flags.writeable = False
+        arrays.append(array)
+        values = array if categories is None else pd.Categorical.from_codes(array, categories)
+        frame_blocks.append((values, np.array(positions, dtype=np.intp)))
+    data = _from_blocks(frame_blocks, pd.RangeIndex(spec['rows']), pd.Index(spec['columns']))
+    return data, arrays
+
+### Build data frames over shared memory described by descriptor, columns are views, not copies
+### Index of attached data frames is RangeIndex
+def attach(descriptor, blocks=None):
+    blocks = _blocks if blocks is None else blocks
+    return {key: _attach_frame(spec, blocks)[0] for key, spec in descriptor.items()}
+
+
+### Initializer of worker processes, e.g. Pool(initializer=init_worker, initargs=(shared.descriptor,))
+def init_worker(descriptor):
+    _attached.update(attach(descriptor))
+
+### Datasets attached in the current worker process
+def datasets():
+    return _attached
@@ -0,0 +1,90 @@
+"""
+##############################################################################
+#######                 PROJECT NAME : CO2 EMISSIONS                   #######
+##############################################################################
+                                Synopsis:
+Module with load, validate and transform steps shared by chart scripts.
+Functions are used as nodes of pipeline.Pipeline, so their arguments must be hashable (tuples instead of lists).
+"""
+
+### Import necessary libraries
+import pandas as pd
+import numpy as np
+from pandas_schema import Column, Schema
+from pandas_schema.validation import CustomElementValidation, DateFormatValidation
+from reconcile import apply_overrides
+
+### Data files
+EMISSIONS_CSV = 'fossil-fuel-co2-emissions-by-nation_csv.csv'
+POPULATION_CSV = 'population_csv.csv'
+GAS_PRICE_CSV = 'natural_gas_price_monthly_csv.csv'
+DRUG_SPENDING_CSV = 'pharmaceutical-drug-spending.csv'
+
+### Emission sources in the emissions data
+SOURCES = ('Solid Fuel', 'Liquid Fuel', 'Gas Fuel', 'Cement', 'Gas Flaring')
+
+
+### Custom number check function
+def int_check(num):
+    try:
+        int(num)
+    except ValueError:
+        return False
+    return True
+
+### Custom float number check function
+def float_check(num):
+    try:
+        float(num)
+    except ValueError:
+        return False
+    return True
+
+
+### Prepare validation rules for Schema
+int_validation = [CustomElementValidation(lambda i: int_check(i),'is not integer value')]
+float_validation = [CustomElementValidation(lambda i: float_check(i),'is not float value')]
+null_validation = [CustomElementValidation(lambda a: a is not np.nan, 'cannot be empty')]
+
+### Validation rules by kind, used in (column, kind) pairs
+RULES = {
+    'null': null_validation,
+    'int': null_validation + int_validation,
+    'float': null_validation + float_validation,
+    'year': [DateFormatValidation('%Y')],
+}
+
+
+### Read csv file, optionally only selected columns
+def load_csv(path, columns=None):
+    return pd.read_csv(path, usecols=list(columns) if columns else None)
+
+### Group data by given column and sum selected columns
+def group_sum(data, by, columns):
+    return data[[by, *columns]].groupby(by).sum()
+
+### Validate data with pandas_schema, rules are pairs of (column, kind) from RULES
+def validate(data, rules):
+    schema = Schema([Column(column, RULES[kind]) for column, kind in rules])
+    return schema.validate(data, columns=list(schema.get_column_names()))
+
+### Isolate validated data from invalid, only errors found in given columns are taken into account
+def drop_errors(data, errors, columns=None):
+    errors_index_rows = [e.row for e in errors if columns is None or e.column in columns]
+    return data.drop(index=errors_index_rows)
+
+### Sort data from maximum value of given column, select columns and take first rows
+def top(data, columns, by, count=None):
+    data = data.sort_values(by, ascending=False)[list(columns)]
+    return data if count is None else data[:count]
+
+### Pivot column into country x year matrix, every year between first and last one gets a column (NaN when missing)
+def country_year_matrix(data, column, by='Country'):
+    matrix = data.pivot_table(index=by, columns='Year', values=column, aggfunc='sum')
+    return matrix.reindex(columns=range(matrix.columns.min(), matrix.columns.max() + 1))
+
+### Merge emissions with population on matching values in columns Country and Year
+### World Bank names are mapped onto emissions names with override table, e.g. 'United States'
+def merge_population(emissions, population):
+    population = population.assign(Country=apply_overrides(population['Country Name'], emissions['Country'], 'population').str.upper())
+    return emissions.merge(population, how='inner', on=['Country', 'Year'])[['Country', 'Total', 'Value', 'Year']]
@@ -0,0 +1,114 @@
+"""
+##############################################################################
+#######                 PROJECT NAME : CO2 EMISSIONS                   #######
+##############################################################################
+                                Synopsis:
+Optional storage backend which imports all four datasets into a local SQLite database with indexes
+on (Country, Year), LOCATION/TIME and Month, and query API fetching only the needed slice of data,
+e.g. rows of one country or cross-section of one year instead of reading whole csv file.
+Run this script to (re)build the database file.
+"""
+
+### Import necessary libraries
+import os
+import sqlite3
+import pandas as pd
+from stages import EMISSIONS_CSV, POPULATION_CSV, GAS_PRICE_CSV, DRUG_SPENDING_CSV
+
+### Default database file
+STORE_DB = 'co2_emission.db'
+
+### Tables with their source csv file and indexed columns
+TABLES = {
+    'emissions': (EMISSIONS_CSV, [('Country', 'Year'), ('Year',)]),
+    'population': (POPULATION_CSV, [('Country', 'Year'), ('Country Code', 'Year'), ('Year',)]),
+    'gas_price': (GAS_PRICE_CSV, [('Month',)]),
+    'drug_spending': (DRUG_SPENDING_CSV, [('LOCATION', 'TIME'), ('TIME',)]),
+}
+
+### Column holding year of a row in each table
+YEAR_COLUMNS = {'emissions': 'Year', 'population': 'Year', 'drug_spending': 'TIME'}
+### Column holding country of a row in each table
+COUNTRY_COLUMNS = {'emissions': 'Country', 'population': 'Country', 'drug_spending': 'LOCATION'}
+
+
+### Quote column name for SQL, columns like 'Solid Fuel' contain spaces
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+### Import csv files into database file, rows are read in chunks so whole file is never held in memory
+def build(path=STORE_DB, chunksize=10000):
+    ### Build into temporary file and rename it, so readers never see half imported database
+    tmp_path = path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        for table, (csv, indexes) in TABLES.items():
+            for chunk in pd.read_csv(csv, chunksize=chunksize):
+                ### Population has names in mixed case, add uppercase Country column matching emissions data
+                if table == 'population':
+                    chunk['Country'] = chunk['Country Name'].str.upper()
+                chunk.to_sql(table, conn, if_exists='append', index=False)
+            for columns in indexes:
+                name = 'idx_' + table + '_' + '_'.join(c.replace(' ', '_') for c in columns)
+                conn.execute(f'CREATE INDEX {quote(name)} ON {quote(table)} ({", ".join(quote(c) for c in columns)})')
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return path
+
+
+### Read only access to the database, several processes can open and read the same file at once
+class Store:
+    def __init__(self, path=STORE_DB):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f'{path} does not exist, build it with store.build()')
+        self.path = path
+        self.conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    ### Fetch rows of table matching all conditions given as {column: value}, only selected columns
+    def query(self, table, columns=None, where=None, order_by=None):
+        if table not in TABLES:
+            raise KeyError(f'unknown table {table}')
+        select = ', '.join(quote(c) for c in columns) if columns else '*'
+        sql = f'SELECT {select} FROM {quote(table)}'
+        params = []
+        if where:
+            sql += ' WHERE ' + ' AND '.join(f'{quote(c)} = ?' for c in where)
+            params = list(where.values())
+        if order_by:
+            sql += f' ORDER BY {quote(order_by)}'
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    ### Rows of one country, e.g. get_country('BELGIUM') or get_country('BEL', table='drug_spending')
+    def get_country(self, country, table='emissions', columns=None):
+        return self.query(table, columns, {COUNTRY_COLUMNS[table]: country}, order_by=YEAR_COLUMNS[table])
+
+    ### Cross-section of one year, equivalent to groupby('Year').get_group(year)
+    def get_year(self, year, table='emissions', columns=None):
+        return self.query(table, columns, {YEAR_COLUMNS[table]: year})
+
+    ### Rows of one country in one year
+    def get_country_year(self, country, year, table='emissions', columns=None):
+        return self.query(table, columns, {COUNTRY_COLUMNS[table]: country, YEAR_COLUMNS[table]: year})
+
+    ### Gas prices for months of one year, months are stored as 'YYYY-MM' strings
+    def get_gas_price(self, year):
+        sql = 'SELECT * FROM gas_price WHERE Month >= ? AND Month < ? ORDER BY Month'
+        return pd.read_sql_query(sql, self.conn, params=[f'{year}-01', f'{year + 1}-01'])
+
+
+if __name__ == '__main__':
+    print(f'Database built: {build()}')
@@ -0,0 +1,68 @@
+"""
+##############################################################################
+#######                 PROJECT NAME : CO2 EMISSIONS                   #######
+##############################################################################
+                                Synopsis:
+Tests of shared.py: attached data frames must equal published ones and their columns must stay views
+of shared memory with the installed pandas version (pinned in requirements.txt).
+Usage: python -m unittest test_shared
+"""
+
+### Import necessary libraries
+import unittest
+from unittest import mock
+from multiprocessing import Pool
+import numpy as np
+import pandas as pd
+import shared
+
+
+### Small dataset with two integer columns, float column and text column with missing value
+def sample():
+    return pd.DataFrame({'Year': [1990, 1991, 1992], 'Country': ['POLAND', None, 'INDIA'],
+                         'Total': [10, 20, 30], 'Per Capita': [0.5, 1.5, 2.5]})
+
+### Sum of Total of attached dataset, runs in worker process
+def worker_total(key):
+    return int(shared.datasets()[key]['Total'].sum())
+
+
+class SharedTest(unittest.TestCase):
+    def test_attach_equals_published(self):
+        data = sample()
+        with shared.publish({'data': data}) as published:
+            blocks = []
+            attached = shared.attach(published.descriptor, blocks)['data']
+            pd.testing.assert_frame_equal(attached.astype({'Country': data['Country'].dtype}), data)
+            del attached
+            for block in blocks:
+                block.close()
+
+    def test_columns_are_views(self):
+        with shared.publish({'data': sample()}) as published:
+            blocks = []
+            spec = published.descriptor['data']
+            attached, arrays = shared._attach_frame(spec, blocks)
+            ### Already consolidated, so consolidating must not copy
+            attached._consolidate_inplace()
+            for (_, positions, _), array in zip(spec['blocks'], arrays):
+                for i in positions:
+                    self.assertTrue(np.shares_memory(shared._values(attached.iloc[:, i]), array), attached.columns[i])
+            del attached, arrays
+            for block in blocks:
+                block.close()
+
+    def test_copied_columns_raise_before_workers(self):
+        from_blocks = shared._from_blocks
+        with mock.patch.object(shared, '_from_blocks', lambda *args: from_blocks(*args).copy()):
+            with self.assertRaises(RuntimeError):
+                shared.publish({'data': sample()})
+
+    def test_workers_attach(self):
+        with shared.publish({'data': sample()}) as published, \
+                Pool(2, initializer=shared.init_worker, initargs=(published.descriptor,)) as pool:
+            self.assertEqual(pool.apply_async(worker_total, ('data',)).get(timeout=60), 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+##############################################################################
+#######                 PROJECT NAME : CO2 EMISSIONS                   #######
+##############################################################################
+                                Synopsis:
+Module which writes output files (error reports, cleaned data, chart images) in a background thread,
+so computing and rendering overlap with disk I/O. Every file is written into temporary file and renamed,
+csv files can be compressed. Queued files are flushed at exit of the program.
+"""
+
+### Import necessary libraries
+import os
+import queue
+import atexit
+import threading
+
+### Suffixes added to compressed csv files
+COMPRESSIONS = {'gzip': '.gz', 'bz2': '.bz2', 'zip': '.zip', 'xz': '.xz'}
+
+
+### Background writer with one thread and queue of pending files
+class Writer:
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.errors = []
+        self.thread = threading.Thread(target=self._run, name='writer', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            path, func = self.queue.get()
+            try:
+                self._atomic(path, func)
+            except Exception as e:
+                self.errors.append((path, e))
+            finally:
+                self.queue.task_done()
+
+    ### Write through temporary file in the same directory and rename it, readers never see half written file
+    @staticmethod
+    def _atomic(path, func):
+        directory, name = os.path.split(path)
+        tmp_path = os.path.join(directory, f'.{name}.tmp')
+        try:
+            func(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    ### Queue write of any file, func(tmp_path) writes content into given path
+    def write(self, path, func):
+        self.queue.put((path, func))
+        return path
+
+    ### Queue write of data frame into csv file, optionally compressed ('gzip', 'bz2', 'zip', 'xz')
+    ### Data frame must not be changed after it is queued
+    def write_csv(self, data, path, compression=None, **kwargs):
+        if compression is not None and not path.endswith(COMPRESSIONS[compression]):
+            path += COMPRESSIONS[compression]
+        if compression == 'zip':
+            ### Member of zip archive is named after the written file, so it is named after the final path
+            compression = {'method': 'zip', 'archive_name': os.path.basename(path)[:-len(COMPRESSIONS['zip'])]}
+        return self.write(path, lambda tmp_path: data.to_csv(tmp_path, compression=compression, **kwargs))
+
+    ### Queue save of figure, format is taken from extension of path
+    ### Figure must not be changed after it is queued
+    def write_figure(self, fig, path, **kwargs):
+        kwargs.setdefault('format', os.path.splitext(path)[1][1:] or None)
+        return self.write(path, lambda tmp_path: fig.savefig(tmp_path, **kwargs))
+
+    ### Wait until all queued files are written, errors of failed writes are raised
+    def flush(self):
+        self.queue.join()
+        if self.errors:
+            errors, self.errors = self.errors, []
+            raise OSError('failed to write ' + ', '.join(f'{path} ({e})' for path, e in errors))
+
+
+### Writer shared by the whole process, created on first use
+_writer = None
+_lock = threading.Lock()
+
+def get_writer():
+    global _writer
+    with _lock:
+        if _writer is None:
+            _writer = Writer()
+            atexit.register(_writer.flush)
+    return _writer
+
+
+### Shortcuts using the shared writer
+def write_csv(data, path, compression=None, **kwargs):
+    return get_writer().write_csv(data, path, compression, **kwargs)
+
+def write_figure(fig, path, **kwargs):
+    return get_writer().write_figure(fig, path, **kwargs)
+
+def flush():
+    if _writer is not None:
+        _writer.flush()